@@ -28,7 +28,8 @@ from ._tdt_controller import TDTController
 from ._trigger_controllers import ParallelTrigger
 from ._sound_controllers import (SoundPlayer, SoundCardController,
                                  _AUTO_BACKENDS)
-from ._input_controllers import Keyboard, CedrusBox, Mouse, Joystick
+from ._input_controllers import (Keyboard, CedrusBox, Mouse, Joystick,
+                                 _PUMP_PERIOD)
 from .visual import Text, Rectangle, Video, _convert_color
 from ._git import assert_version, __version__
 
@@ -201,6 +202,7 @@ class ExperimentController(object):
             self._time_corrections = dict()
             self._time_correction_fxns = dict()
             self._time_correction_maxs = dict()  # optional, defaults to 50e-6
+            self._next_pump_time = 0.  # gate for _pump_events
 
             # dictionary for experiment metadata
             self._exp_info = OrderedDict()
@@ -914,6 +916,19 @@ class ExperimentController(object):
         timeout = 0
         platform_event_loop.step(timeout)
 
+    def _pump_events(self):
+        """Dispatch events at most once per pump period.
+
+        Shared by the keyboard and mouse handlers so that polling both in
+        the same loop pumps the platform event queue once per period
+        instead of once per handler. Use ``_dispatch_events`` directly for
+        an unconditional (synchronous) pump.
+        """
+        now = self._master_clock()
+        if now >= self._next_pump_time:
+            self._dispatch_events()
+            self._next_pump_time = now + _PUMP_PERIOD
+
     def _end_event_loop(self):
         from pyglet.app import platform_event_loop, event_loop
         event_loop.is_running = False
@@ -8,7 +8,9 @@
 # License: BSD (3-clause)
 
 from functools import partial
+from math import isinf
 import sys
+import time
 
 import numpy as np
 
@@ -16,6 +18,100 @@ from .visual import (Triangle, Rectangle, Circle, Diamond, ConcentricCircles,
                      FixationDot)
 from ._utils import clock, string_types, logger
 
+# Interval between event-queue polls in the wait_* methods. Sleeping between
+# polls keeps the CPU (nearly) idle while waiting for a response, and is well
+# below the resolution of human response times.
+_POLL_SLICE = 0.002
+
+# Minimum interval between pyglet event-queue pumps during retrieval. Pumping
+# walks the platform event queue (select/XPending/PeekMessage), which
+# dominates the cost of an empty poll, so callers that poll faster than this
+# (e.g. check_force_quit during wait_secs) reuse the previous pump.
+_PUMP_PERIOD = 0.001
+
+
+def _pump_until(master_clock, deadline):
+    """Sleep until the next poll slice (or deadline), yielding the CPU."""
+    remaining = deadline - master_clock()
+    if remaining > 0:
+        time.sleep(min(remaining, _POLL_SLICE))
+
+
+def _clean_key_name(name):
+    """Convert a pyglet key constant name to the expyfun key name."""
+    name = name.lower()
+    if name.startswith('_'):
+        name = name[1:]
+    if name.startswith('num_'):
+        name = name[4:]
+    return name
+
+
+# power of two so indices wrap with a cheap mask
+_RING_CAPACITY = 4096
+_KEY_DTYPE = [('key', 'U32'), ('time', 'f8'), ('type', 'U8')]
+_BUTTON_DTYPE = [('button', 'U8'), ('x', 'i4'), ('y', 'i4'), ('time', 'f8')]
+
+# pyglet.window.mouse.{LEFT, MIDDLE, RIGHT}; module-level so the click
+# callback needs only a global load, not an instance-dict lookup
+_BUTTON_NAMES = {1: 'left', 2: 'middle', 4: 'right'}
+
+# events landing in a single pump before we warn that the loop fell behind
+_BACKLOG_WARN = 256
+
+
+def _drain_keyboard_events(buf, live_keys, kinds):
+    """Filter drained ring contents down to the matching key events.
+
+    This is the per-poll kernel of the response path; all per-event work
+    happens in C via numpy, with a cheap equality compare for the dominant
+    single-kind ('presses' or 'releases') case.
+    """
+    if not len(buf):  # common case in wait loops: nothing pressed yet
+        return buf
+    if len(kinds) == 1:
+        mask = buf['type'] == kinds[0]
+    else:
+        mask = np.isin(buf['type'], kinds)
+    if live_keys is not None:
+        mask &= np.isin(buf['key'], live_keys)
+    return buf[mask]
+
+
+class _EventRing(object):
+    """Fixed-capacity ring buffer for input events.
+
+    Backed by a preallocated numpy structured array plus head/tail counters,
+    with a single producer (the event callback) and a single consumer (the
+    ``_retrieve_*`` methods). Appends are O(1) with no reallocation, and the
+    fixed capacity bounds memory use if a buffer is never cleared during a
+    long block; once full, the oldest event is overwritten.
+    """
+
+    def __init__(self, dtype, capacity=_RING_CAPACITY):
+        assert capacity > 0 and (capacity & (capacity - 1)) == 0
+        self._data = np.empty(capacity, dtype=dtype)
+        self._mask = capacity - 1
+        self._head = 0  # oldest retained event
+        self._tail = 0  # next write position
+
+    def __len__(self):
+        return self._tail - self._head
+
+    def append(self, event):
+        if self._tail - self._head > self._mask:
+            self._head += 1  # full: drop the oldest event
+        self._data[self._tail & self._mask] = event
+        self._tail += 1
+
+    def get(self):
+        """Get a contiguous copy of the buffered events (oldest first)."""
+        idx = np.arange(self._head, self._tail) & self._mask
+        return self._data[idx]
+
+    def clear(self):
+        self._head = self._tail
+
 
 class Keyboard(object):
     """Retrieve presses from various devices.
@@ -36,20 +132,29 @@ class Keyboard(object):
 
     key_event_types = {'presses': ['press'], 'releases': ['release'],
                        'both': ['press', 'release']}
+    _sym_table = None  # symbol -> name lookup, shared by subclasses
 
     def __init__(self, ec, force_quit_keys):
+        if Keyboard._sym_table is None:
+            from pyglet.window import key
+            Keyboard._sym_table = dict(
+                (sym, _clean_key_name(name))
+                for sym, name in key._key_names.items())
         self.master_clock = ec._master_clock
         self.log_presses = ec._log_presses
+        self._clock = clock  # the monotonic time source for event stamps
         self.force_quit_keys = force_quit_keys
+        self._force_quit_set = frozenset(force_quit_keys)
         self.listen_start = None
         ec._time_correction_fxns['keypress'] = self._get_timebase
-        self.get_time_corr = partial(ec._get_time_correction, 'keypress')
-        self.time_correction = self.get_time_corr()
+        self._time_corr_key = 'keypress'
+        self.time_correction = ec._get_time_correction('keypress')
         self.ec = ec
         # always init pyglet response handler for error (and non-error) keys
         self.ec._win.on_key_press = self._on_pyglet_keypress
         self.ec._win.on_key_release = self._on_pyglet_keyrelease
-        self._keyboard_buffer = []
+        self._keyboard_buffer = _EventRing(_KEY_DTYPE)
+        self._normalized_live = None
 
     ###########################################################################
     # Methods to be overridden by subclasses
@@ -63,36 +168,44 @@ class Keyboard(object):
     def _get_timebase(self):
         """Get keyboard time reference (in seconds)
         """
-        return clock()
+        return self._clock()
 
     def _clear_keyboard_events(self):
+        n_before = len(self._keyboard_buffer)
         self.ec._dispatch_events()
-        self._keyboard_buffer = []
+        n_queued = len(self._keyboard_buffer) - n_before
+        if n_queued > _BACKLOG_WARN:
+            logger.warning('Expyfun: {} key events had queued up since the '
+                           'last pump; timestamps of queued events reflect '
+                           'when they were dispatched, not when the keys '
+                           'were pressed.'.format(n_queued))
+        self._keyboard_buffer.clear()
+        self.ec._next_pump_time = 0.  # force a pump on the next retrieval
+
+    def _normalize_keys(self, live_keys):
+        """Normalize live keys to str (accepting ints) and add escape keys."""
+        if live_keys is None:
+            return None
+        return [str(x) for x in live_keys] + list(self.force_quit_keys)
 
     def _retrieve_keyboard_events(self, live_keys, kind='presses'):
-        # add escape keys
-        if live_keys is not None:
-            live_keys = [str(x) for x in live_keys]  # accept ints
-            live_keys.extend(self.force_quit_keys)
-        self.ec._dispatch_events()  # pump events on pyglet windows
-        targets = []
-
-        for key in self._keyboard_buffer:
-            if key[2] in self.key_event_types[kind]:
-                if live_keys is None or key[0] in live_keys:
-                    targets.append(key)
-        return targets
+        # live_keys must already be normalized (see _normalize_keys)
+        self.ec._pump_events()  # pump events on pyglet windows
+        return self._filter_keyboard_events(live_keys, kind)
+
+    def _filter_keyboard_events(self, live_keys, kind):
+        """Filter the buffer to matching events (as a structured array)."""
+        return _drain_keyboard_events(self._keyboard_buffer.get(), live_keys,
+                                      self.key_event_types[kind])
 
     def _on_pyglet_keypress(self, symbol, modifiers, emulated=False,
                             isPress=True):
         """Handler for on_key_press pyglet events"""
-        key_time = clock()
+        key_time = self._clock()
         if emulated:
             this_key = str(symbol)
         else:
-            from pyglet.window import key
-            this_key = key.symbol_string(symbol).lower()
-            this_key = this_key.lstrip('_').lstrip('NUM_')
+            this_key = self._sym_table.get(symbol) or str(symbol)
         press_or_release = {True: 'press', False: 'release'}[isPress]
         self._keyboard_buffer.append((this_key, key_time, press_or_release))
 
@@ -102,7 +215,8 @@ class Keyboard(object):
 
     def listen_presses(self):
         """Start listening for keypresses."""
-        self.time_correction = self.get_time_corr()
+        self.time_correction = self.ec._get_time_correction(
+            self._time_corr_key)
         self.listen_start = self.master_clock()
         self._clear_events()
 
@@ -128,16 +242,17 @@ class Keyboard(object):
         presses : list
             The presses (and possibly timestamps and/or types).
         """
-        if kind not in self.key_event_types.keys():
+        if kind not in self.key_event_types:
             raise ValueError('Kind argument must be one of: '+', '.join(
                              self.key_event_types.keys()))
-        events = []
         if timestamp and relative_to is None:
-            if self.listen_start is None:
+            # the common (timestamp=True, relative_to=None) call pattern:
+            # resolve against the memoized listen_presses start time
+            relative_to = self.listen_start
+            if relative_to is None:
                 raise ValueError('I cannot timestamp: relative_to is None and '
                                  'you have not yet called listen_presses.')
-            relative_to = self.listen_start
-        events = self._retrieve_events(live_keys, kind)
+        events = self._retrieve_events(self._normalize_keys(live_keys), kind)
         events = self._correct_presses(events, timestamp, relative_to, kind)
         events = [e[:-1] for e in events] if not return_kinds else events
         return events
@@ -166,10 +281,17 @@ class Keyboard(object):
         """
         relative_to, start_time = self._init_wait_press(
             max_wait, min_wait, live_keys, relative_to)
+        # hoist attribute lookups out of the polling loop
+        deadline = start_time + max_wait
+        master_clock = self.master_clock
+        retrieve = self._retrieve_events
+        live_keys = self._normalized_live
         pressed = []
-        while (not len(pressed) and
-               self.master_clock() - start_time < max_wait):
-            pressed = self._retrieve_events(live_keys)
+        while not len(pressed) and master_clock() < deadline:
+            pressed = retrieve(live_keys)
+            if not len(pressed):
+                _pump_until(master_clock, deadline)
+        self._normalized_live = None
 
         # handle non-presses
         if len(pressed):
@@ -201,11 +323,21 @@ class Keyboard(object):
         pressed : list
             The list of presses (and possibly timestamps).
         """
+        from pyglet.app import platform_event_loop
         relative_to, start_time = self._init_wait_press(
             max_wait, min_wait, live_keys, relative_to)
-        pressed = []
-        while (self.master_clock() - start_time < max_wait):
-            pressed = self._retrieve_events(live_keys)
+        # this wait never returns early, so instead of polling we can sleep
+        # in the platform event loop (select on Linux, a waitable timer on
+        # Windows), which dispatches events as they arrive; the buffer is
+        # then drained once after the deadline passes
+        deadline = start_time + max_wait
+        master_clock = self.master_clock
+        remaining = deadline - master_clock()
+        while remaining > 0:
+            platform_event_loop.step(remaining)
+            remaining = deadline - master_clock()
+        pressed = self._retrieve_events(self._normalized_live)
+        self._normalized_live = None
         pressed = self._correct_presses(pressed, timestamp, relative_to)
         pressed = [p[:2] if timestamp else p[0] for p in pressed]
         return pressed
@@ -221,40 +353,50 @@ class Keyboard(object):
             Keys to check.
         """
         if keys is None:
+            if not self._force_quit_set:  # e.g. Joystick
+                return
             # only grab the force-quit keys
-            keys = self._retrieve_keyboard_events([])
+            quit_ = len(self._retrieve_keyboard_events(
+                list(self.force_quit_keys))) > 0
         else:
             if isinstance(keys, string_types):
                 keys = [keys]
             if isinstance(keys, list):
-                keys = [k for k in keys if k in self.force_quit_keys]
+                quit_ = bool(self._force_quit_set.intersection(keys))
             else:
                 raise TypeError('Force quit checking requires a string or '
                                 ' list of strings, not a {}.'
                                 ''.format(type(keys)))
-        if len(keys):
+        if quit_:
             raise RuntimeError('Quit key pressed')
 
     def _correct_presses(self, events, timestamp, relative_to, kind='presses'):
         """Correct timing of presses and check for quit press."""
-        events = [(k, s + self.time_correction, r) for k, s, r in events]
-        self.log_presses(events)
-        keys = [k[0] for k in events]
+        if not len(events):
+            return []
+        keys = events['key'].tolist()
+        types = events['type'].tolist()
+        times = events['time'] + self.time_correction
+        self.log_presses(list(zip(keys, times.tolist(), types)))
         self.check_force_quit(keys)
-        events = [e for e in events if e[2] in self.key_event_types[kind]]
+        keep = np.isin(events['type'], self.key_event_types[kind])
+        if not keep.all():
+            keys = events['key'][keep].tolist()
+            types = events['type'][keep].tolist()
+            times = times[keep]
         if timestamp:
-            events = [(k, s - relative_to, t) for (k, s, t) in events]
+            return list(zip(keys, (times - relative_to).tolist(), types))
         else:
-            events = [(k, t) for (k, s, t) in events]
-        return events
+            return list(zip(keys, types))
 
     def _init_wait_press(self, max_wait, min_wait, live_keys, relative_to):
         """Prepare for ``wait_one_press`` and ``wait_for_presses``."""
-        if np.isinf(max_wait) and live_keys == []:
+        if isinf(max_wait) and live_keys == []:
             raise ValueError('max_wait cannot be infinite if there are no live'
                              ' keys.')
         if not min_wait <= max_wait:
             raise ValueError('min_wait must be less than max_wait')
+        self._normalized_live = self._normalize_keys(live_keys)
         start_time = self.master_clock()
         relative_to = start_time if relative_to is None else relative_to
         self.ec.wait_secs(min_wait)
@@ -292,16 +434,18 @@ class Mouse(object):
         self.ec = ec
         self.set_visible(visible)
         self.master_clock = ec._master_clock
+        self._clock = clock  # the monotonic time source for event stamps
         self.log_clicks = ec._log_clicks
         self.listen_start = None
         ec._time_correction_fxns['mouseclick'] = self._get_timebase
-        self.get_time_corr = partial(ec._get_time_correction, 'mouseclick')
-        self.time_correction = self.get_time_corr()
+        self._time_corr_key = 'mouseclick'
+        self.time_correction = ec._get_time_correction('mouseclick')
         self._check_force_quit = ec.check_force_quit
         self.ec._win.on_mouse_press = self._on_pyglet_mouse_click
-        self._mouse_buffer = []
-        self._button_names = {mouse.LEFT: 'left', mouse.MIDDLE: 'middle',
-                              mouse.RIGHT: 'right'}
+        self._mouse_buffer = _EventRing(_BUTTON_DTYPE)
+        assert all(_BUTTON_NAMES[id_] == name for name, id_ in
+                   (('left', mouse.LEFT), ('middle', mouse.MIDDLE),
+                    ('right', mouse.RIGHT)))
         self._button_ids = {'left': mouse.LEFT, 'middle': mouse.MIDDLE,
                             'right': mouse.RIGHT}
         self._legal_types = (Rectangle, Circle)
@@ -344,43 +488,49 @@ class Mouse(object):
     def _get_timebase(self):
         """Get mouse time reference (in seconds)
         """
-        return clock()
+        return self._clock()
 
     def _clear_mouse_events(self):
+        n_before = len(self._mouse_buffer)
         self.ec._dispatch_events()
-        self._mouse_buffer = []
+        n_queued = len(self._mouse_buffer) - n_before
+        if n_queued > _BACKLOG_WARN:
+            logger.warning('Expyfun: {} mouse events had queued up since the '
+                           'last pump; timestamps of queued events reflect '
+                           'when they were dispatched, not when the clicks '
+                           'occurred.'.format(n_queued))
+        self._mouse_buffer.clear()
+        self.ec._next_pump_time = 0.  # force a pump on the next retrieval
 
     def _retrieve_mouse_events(self, live_buttons):
-        self.ec._dispatch_events()  # pump events on pyglet windows
-        targets = []
-        for button in self._mouse_buffer:
-            if live_buttons is None or button[0] in live_buttons:
-                targets.append(button)
-        return targets
+        self.ec._pump_events()  # pump events on pyglet windows
+        buf = self._mouse_buffer.get()
+        if not len(buf) or live_buttons is None:
+            return buf
+        return buf[np.isin(buf['button'], live_buttons)]
 
     def _on_pyglet_mouse_click(self, x, y, button, modifiers):
         """Handler for on_mouse_press pyglet events"""
-        button_time = clock()
-        this_button = self._button_names[button]
+        button_time = self._clock()
+        this_button = _BUTTON_NAMES[button]
         self._mouse_buffer.append((this_button, x, y, button_time))
 
     def listen_clicks(self):
         """Start listening for mouse clicks.
         """
-        self.time_correction = self.get_time_corr()
+        self.time_correction = self.ec._get_time_correction(
+            self._time_corr_key)
         self.listen_start = self.master_clock()
         self._clear_events()
 
     def get_clicks(self, live_buttons, timestamp, relative_to):
         """Get the current entire mouse buffer.
         """
-        clicked = []
         if timestamp and relative_to is None:
-            if self.listen_start is None:
+            relative_to = self.listen_start
+            if relative_to is None:
                 raise ValueError('I cannot timestamp: relative_to is None and '
                                  'you have not yet called listen_clicks.')
-            else:
-                relative_to = self.listen_start
         clicked = self._retrieve_events(live_buttons)
         return self._correct_clicks(clicked, timestamp, relative_to)
 
@@ -391,10 +541,15 @@ class Mouse(object):
         relative_to, start_time, was_visible = self._init_wait_click(
             max_wait, min_wait, live_buttons, timestamp, relative_to, visible)
 
+        # hoist attribute lookups out of the polling loop
+        deadline = start_time + max_wait
+        master_clock = self.master_clock
+        retrieve = self._retrieve_events
         clicked = []
-        while (not len(clicked) and
-               self.master_clock() - start_time < max_wait):
-            clicked = self._retrieve_events(live_buttons)
+        while not len(clicked) and master_clock() < deadline:
+            clicked = retrieve(live_buttons)
+            if not len(clicked):
+                _pump_until(master_clock, deadline)
 
         # handle non-clicks
         if len(clicked):
@@ -412,9 +567,14 @@ class Mouse(object):
         relative_to, start_time, was_visible = self._init_wait_click(
             max_wait, min_wait, live_buttons, timestamp, relative_to, visible)
 
+        # hoist attribute lookups out of the polling loop
+        deadline = start_time + max_wait
+        master_clock = self.master_clock
+        retrieve = self._retrieve_events
         clicked = []
-        while (self.master_clock() - start_time < max_wait):
-            clicked = self._retrieve_events(live_buttons)
+        while master_clock() < deadline:
+            clicked = retrieve(live_buttons)
+            _pump_until(master_clock, deadline)
         return self._correct_clicks(clicked, timestamp, relative_to)
 
     def wait_for_click_on(self, objects, max_wait, min_wait,
@@ -424,16 +584,22 @@ class Mouse(object):
         relative_to, start_time, was_visible = self._init_wait_click(
             max_wait, min_wait, live_buttons, timestamp, relative_to, True)
 
+        # hoist attribute lookups out of the polling loop
+        deadline = start_time + max_wait
+        master_clock = self.master_clock
+        retrieve = self._retrieve_events
         index = None
         ci = 0
-        while (self.master_clock() - start_time < max_wait and
-               index is None):
-            clicked = self._retrieve_events(live_buttons)
+        while master_clock() < deadline and index is None:
+            clicked = retrieve(live_buttons)
             self._check_force_quit()
+            if not len(clicked):
+                _pump_until(master_clock, deadline)
             while ci < len(clicked) and index is None:  # clicks first
+                pos = np.array([clicked['x'][ci], clicked['y'][ci]])
                 oi = 0
                 while oi < len(objects) and index is None:  # then objects
-                    if self._point_in_object(clicked[ci][1:3], objects[oi]):
+                    if self._point_in_object(pos, objects[oi]):
                         index = oi
                     oi += 1
                 ci += 1
@@ -452,24 +618,24 @@ class Mouse(object):
 
     def _correct_clicks(self, clicked, timestamp, relative_to):
         """Correct timing of clicks"""
-        if len(clicked):
-            clicked = [(b, x, y, s + self.time_correction) for
-                       b, x, y, s in clicked]
-            self.log_clicks(clicked)
-            buttons = [(b, x, y) for b, x, y, _ in clicked]
-            self._check_force_quit()
-            if timestamp:
-                clicked = [(b, x, y, s - relative_to) for
-                           b, x, y, s in clicked]
-            else:
-                clicked = buttons
-        return clicked
+        if not len(clicked):
+            return []
+        buttons = clicked['button'].tolist()
+        xs = clicked['x'].tolist()
+        ys = clicked['y'].tolist()
+        times = clicked['time'] + self.time_correction
+        self.log_clicks(list(zip(buttons, xs, ys, times.tolist())))
+        self._check_force_quit()
+        if timestamp:
+            return list(zip(buttons, xs, ys, (times - relative_to).tolist()))
+        else:
+            return list(zip(buttons, xs, ys))
 
     def _init_wait_click(self, max_wait, min_wait, live_buttons, timestamp,
                          relative_to, visible):
         """Actions common to ``wait_one_click`` and ``wait_for_clicks``
         """
-        if np.isinf(max_wait) and live_buttons == []:
+        if isinf(max_wait) and live_buttons == []:
             raise ValueError('max_wait cannot be infinite if there are no live'
                              ' mouse buttons.')
         if not min_wait <= max_wait:
@@ -597,29 +763,21 @@ class CedrusBox(Keyboard):
 
     def _clear_events(self):
         self._retrieve_events(None)
-        self._keyboard_buffer = []
+        self._keyboard_buffer.clear()
 
     def _retrieve_events(self, live_keys, kind='presses'):
-        # add escape keys
-        if live_keys is not None:
-            live_keys = [str(x) for x in live_keys]  # accept ints
-            live_keys.extend(self.force_quit_keys)
+        # live_keys must already be normalized (see _normalize_keys)
         # pump for events
         self._dev.poll_for_response()
         while self._dev.response_queue_size() > 0:
             key = self._dev.get_next_response()
             press_or_release = {True: 'press',
                                 False: 'release'}[key['pressed']]
-            key = [str(key['key'] + 1), key['time'] / 1000., press_or_release]
+            key = (str(key['key'] + 1), key['time'] / 1000., press_or_release)
             self._keyboard_buffer.append(key)
             self._dev.poll_for_response()
         # check to see if we have matches
-        targets = []
-        for key in self._keyboard_buffer:
-            if key[2] in self.key_event_types[kind]:
-                if live_keys is None or key[0] in live_keys:
-                    targets.append(key)
-        return targets
+        return self._filter_keyboard_events(live_keys, kind)
 
 
 class Joystick(Keyboard):
@@ -635,12 +793,14 @@ class Joystick(Keyboard):
         self.ec = ec
         self.master_clock = ec._master_clock
         self.log_presses = partial(ec._log_presses, kind='joy')
+        self._clock = clock
         self.force_quit_keys = []
+        self._force_quit_set = frozenset()
         self.listen_start = None
         ec._time_correction_fxns['joystick'] = self._get_timebase
-        self.get_time_corr = partial(ec._get_time_correction, 'joystick')
-        self.time_correction = self.get_time_corr()
-        self._keyboard_buffer = []
+        self._time_corr_key = 'joystick'
+        self.time_correction = ec._get_time_correction('joystick')
+        self._keyboard_buffer = _EventRing(_KEY_DTYPE)
         self._dev = pyglet.input.get_joysticks()[0]
         logger.info('Expyfun: Initializing joystick %s' % (self._dev.device,))
         self._dev.open(window=ec._win, exclusive=True)
@@ -652,7 +812,7 @@ class Joystick(Keyboard):
 
     def _on_pyglet_joybutton(self, joystick, button='foo', kind='press'):
         """Handler for on_joybutton_press events."""
-        key_time = clock()
+        key_time = self._clock()
         self._keyboard_buffer.append((str(button), key_time, kind))
 
     def _close(self):
@@ -358,7 +358,8 @@ class TDTController(Keyboard):  # lgtm [py/missing-call-to-init]
         else:
             presses = []
         # adds force_quit presses
-        presses.extend(self._retrieve_keyboard_events([]))
+        presses.extend(self._retrieve_keyboard_events(
+            list(self.force_quit_keys)).tolist())
         return presses
 
     def _correct_presses(self, events, timestamp, relative_to, kind='presses'):